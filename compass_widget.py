@@ -6,12 +6,12 @@ Date:        2021-09-20
 Description: Animated compass widget
 """
 
-import numpy as np
 import tkinter as tk
 import logging
+import threading
 import time
 from PIL import Image, ImageTk
-from math import pi, degrees, radians
+from math import pi, ceil, cos, sin, degrees, radians
 from pubsub import pub
 
 from damped_spring import DampedSpring
@@ -22,22 +22,17 @@ class Compass(tk.Frame):
     The Compass class implements a (skeumorphic) liquid
     damped compass
     """
-    wind_rose = {'N': 0.0,
-                 'NNE': pi / 8,
-                 'NE': pi / 4,
-                 'ENE': pi*3 / 8,
-                 'E': pi / 2,
-                 'ESE': pi*5 / 8,
-                 'SE': pi*3 / 4,
-                 'SSE': pi*7 / 8,
-                 'S': pi,
-                 'SSW': pi*9 / 8,
-                 'SW': pi*5 / 4,
-                 'WSW': pi*11 / 8,
-                 'W': pi*3 / 2,
-                 'WNW': pi*13 / 8,
-                 'NW': pi*7 / 4,
-                 'NNW': pi*15 / 8}
+    # the 16 wind directions, pi/8 apart
+    wind_rose = dict(zip(('N', 'NNE', 'NE', 'ENE',
+                          'E', 'ESE', 'SE', 'SSE',
+                          'S', 'SSW', 'SW', 'WSW',
+                          'W', 'WNW', 'NW', 'NNW'),
+                         (i * pi / 8 for i in range(16))))
+    sheet_columns = 18  # sprite sheet layout, 18 x 20 rotations
+    # rotations (degrees) that do not need resampling
+    transpose = {90: Image.ROTATE_90,
+                 180: Image.ROTATE_180,
+                 270: Image.ROTATE_270}
 
     def __init__(self, master, *args, **kwargs):
         super().__init__(master, *args, **kwargs)
@@ -56,9 +51,12 @@ class Compass(tk.Frame):
         self.animation_angle = self.angle_begin
         self.animation_max_time = 1.75  # seconds
         self.animation_start_time = 0.0
+        self._animation_deadline = 0.0
         self.animation_active = False
         self._animation_direction = 1
         self._animation_next = self.animate_move
+        self._animate_pending = None  # after_idle id of a pending animate
+        self._tick_pending = False  # animation timer scheduled
 
         # spring parameters
         self.k = 100  # spring constant
@@ -78,16 +76,30 @@ class Compass(tk.Frame):
         bg = ImageTk.PhotoImage(img_bg)
         self.bg = bg  # keep reference
 
-        self.img_disc = Image.open('./images/compass_disc.png')
+        # decode and convert once, before the baking thread shares it
+        self.img_disc = Image.open('./images/compass_disc.png').convert('RGBA')
         disc = ImageTk.PhotoImage(self.img_disc)
-        self.disc = disc
+        self.disc = disc  # updated in place
+        self._disc_shown = None  # displayed rotation (degrees, resample)
+
+        # affine (inverse) rotation matrix for every degree, as computed
+        # by Image.rotate() around the image center
+        cx, cy = self.img_disc.width / 2, self.img_disc.height / 2
+        self._affine_mats = []
+        for deg in range(360):
+            cos_a = round(cos(-radians(deg)), 15)
+            sin_a = round(sin(-radians(deg)), 15)
+            self._affine_mats.append((cos_a, sin_a,
+                                      cx - cos_a * cx - sin_a * cy,
+                                      -sin_a, cos_a,
+                                      cy + sin_a * cx - cos_a * cy))
 
         self.canvas = tk.Canvas(self, width=img_bg.width, height=img_bg.height)
         self.canvas.configure(state=tk.DISABLED, bg='gray25')
         self.canvas.pack()
 
         self.canvas.create_image(self.center, image=bg)
-        self.canvas.create_image(self.center, image=disc)
+        self._disc_item = self.canvas.create_image(self.center, image=disc)
 
         # pan and zoom stuff
         self.pan_x = 0
@@ -95,6 +107,7 @@ class Compass(tk.Frame):
         self.pan_x_start = 0
         self.pan_y_start = 0
         self.pan_distance = 0.0
+        self._pan_pending = False  # pan redraw scheduled
 
         self.canvas.bind("<Button-3>", self.mouse_pan_start)
         self.canvas.bind("<B3-Motion>", self.mouse_pan)
@@ -102,6 +115,14 @@ class Compass(tk.Frame):
 
         pub.subscribe(self.angle_changed, 'angle_changed')
 
+        # bake the disc rotations while Tk starts up
+        width, height = self.img_disc.size
+        rows = ceil(360 / self.sheet_columns)
+        self._sheet = Image.new('RGBA',
+                                (width * self.sheet_columns, height * rows))
+        self._baked = 0  # number of rotations on the sprite sheet
+        threading.Thread(target=self._bake_rotations, daemon=True).start()
+
         self.display_compass()
 
     @property
@@ -115,6 +136,25 @@ class Compass(tk.Frame):
 
         :param value: The angle in radians {-pi,pi} 0.0 pointing North
         """
+        self._angle_target(value)
+        if not self.animation_active:
+            self.animate()
+
+    def set_angle_fast(self, value):
+        """
+        Set the angle (radians), for rapidly repeated updates (key repeat)
+
+        Unlike the angle property the animation starts once Tk is idle,
+        so a burst of updates results in a single animation.
+
+        :param value: The angle in radians {-pi,pi} 0.0 pointing North
+        """
+        self._angle_target(value)
+        if not self.animation_active and self._animate_pending is None:
+            self._animate_pending = self.after_idle(self._animate_idle)
+
+    def _angle_target(self, value):
+        """ Set the angle to animate to, and the direction to move in """
         self._angle = self.angle_limit(value)
         if self._angle > self.animation_angle:
             self._animation_direction = 1
@@ -122,6 +162,9 @@ class Compass(tk.Frame):
             self._animation_direction = -1
         # allow for repositioning during an active animation
         self._animation_next = self.animate_move
+
+    def _animate_idle(self):
+        self._animate_pending = None
         if not self.animation_active:
             self.animate()
 
@@ -143,11 +186,7 @@ class Compass(tk.Frame):
         self.angle = angle
 
     def angle_limit(self, angle):
-        if angle < self.angle_min:
-            angle = self.angle_min
-        elif angle > self.angle_max:
-            angle = self.angle_max
-        return angle
+        return max(self.angle_min, min(self.angle_max, angle))
 
     def cardinal_point(self, heading='N'):
         """ Move to the given wind direction """
@@ -155,7 +194,7 @@ class Compass(tk.Frame):
         if heading in self.wind_rose:
             self.angle = self.wind_rose[heading]
         else:
-            logging.info("Invalid cardinal-point: {}".format(heading))
+            logging.info("Invalid cardinal-point: %s", heading)
 
     def animate(self):
         """
@@ -173,8 +212,24 @@ class Compass(tk.Frame):
         """
         self.animation_active = True
         pub.sendMessage('animation_begin')
-        self.animation_start_time = time.time()
+        self.animation_start_time = time.monotonic()
+        self._animation_deadline = (self.animation_start_time +
+                                    self.animation_max_time)
+        if not self._tick_pending:
+            self._tick()
+
+    def _tick(self):
+        """
+        Animation driver; a single timer runs the active state
+        (animate_move or animate_bounce) once per frame
+        """
+        self._tick_pending = False
         self._animation_next()
+        # animate() may have been re-entered (from an animation_end
+        # subscriber) and scheduled the next tick already
+        if self.animation_active and not self._tick_pending:
+            self._tick_pending = True
+            self.master.after(self.animation_speed, self._tick)
 
     def animate_move(self):
         """ Move to the target position """
@@ -192,24 +247,34 @@ class Compass(tk.Frame):
                                        k1_drag=self.k1_drag,
                                        h0=self.h0,
                                        v0=self.v0)
+            # precompute the bounce, continued when it lasts any longer
+            self._bounce_steps = max(1, ceil(self.animation_max_time /
+                                             self.dt))
+            self._bounce_trajectory = self.spring.trajectory(
+                self._bounce_steps)
+            self._bounce_index = 0
             self._animation_next = self.animate_bounce
-        self.master.after(self.animation_speed, self._animation_next)
 
     def animate_bounce(self):
-        elapsed = time.time() - self.animation_start_time
-        swing = self.spring.bounce()
-        if elapsed < self.animation_max_time or abs(swing) > 0.001:
+        now = time.monotonic()
+        if self._bounce_index >= len(self._bounce_trajectory):
+            self._bounce_trajectory = self.spring.trajectory(
+                self._bounce_steps)
+            self._bounce_index = 0
+        swing = float(self._bounce_trajectory[self._bounce_index])
+        self._bounce_index += 1
+        if now < self._animation_deadline or abs(swing) > 0.001:
             if self.animation_direction > 0:
                 angle = self.angle + swing
             else:
                 angle = self.angle - swing
             self.display_compass(angle)
-            self.master.after(self.animation_speed, self._animation_next)
         else:
             self.animation_active = False
             self.animation_angle = self.angle  # animation under- or overshoot
-            self.display_compass()
-            pub.sendMessage('animation_end', duration=elapsed)
+            self.display_compass(resample=Image.BILINEAR)
+            pub.sendMessage('animation_end',
+                            duration=now - self.animation_start_time)
 
     def mouse_pan_start(self, event):
         if not self.animation_active:
@@ -226,9 +291,9 @@ class Compass(tk.Frame):
             dy = event.y - self.pan_y_start
             diff = 10
             if abs(dx) > diff:
-                self.animation_direction = -1 * np.sign(dx)
+                self.animation_direction = -1 if dx > 0 else 1
             elif abs(dy) > diff:
-                self.animation_direction = np.sign(dy)
+                self.animation_direction = 1 if dy > 0 else -1
             self._angle = self.animation_angle
             self.animate()
 
@@ -244,14 +309,78 @@ class Compass(tk.Frame):
                 self.pan_distance = (self.angle_step *
                                      self.angle_resolution * dy) / 8
             self.animation_angle += self.pan_distance
-            self.display_compass()
+            # redraw once per idle cycle, for all motion events until then
+            if not self._pan_pending:
+                self._pan_pending = True
+                self.after_idle(self._flush_pan)
 
-    def display_compass(self, angle=None):
+    def _flush_pan(self):
+        self._pan_pending = False
+        self.display_compass()
+
+    def display_compass(self, angle=None, resample=Image.NEAREST):
+        """
+        Show the disc at the given angle
+
+        The moving disc uses the cached (NEAREST) rotations, the disc at
+        rest can be rendered with a smoother resampling filter.
+        """
         if angle is None:
             angle = self.animation_angle
-        self.canvas.delete(self.disc)
+        deg = round(degrees(angle)) % 360  # int, like the canvas coordinates
+        shown = (deg, resample)
+        if shown == self._disc_shown:
+            return  # nothing changed on screen
+        self._disc_shown = shown
+        if resample == Image.NEAREST:
+            img_rot = self.disc_image(deg)
+        else:
+            img_rot = self.rotate_disc(deg, resample)
+        # reuse the PhotoImage (and its Tk pixel buffer)
+        self.disc.paste(img_rot)
+
+    def disc_image(self, deg):
+        """
+        Return the disc image rotated by the given angle
+
+        The rotations are cut from the sprite sheet, as soon as these
+        are baked.
+
+        :param deg: The angle in (integer) degrees {0,359}
+        """
+        if deg >= self._baked:
+            return self.rotate_disc(deg)
+        width, height = self.img_disc.size
+        x = (deg % self.sheet_columns) * width
+        y = (deg // self.sheet_columns) * height
+        return self._sheet.crop((x, y, x + width, y + height))
+
+    def rotate_disc(self, deg, resample=Image.NEAREST):
+        """
+        Return the (PIL) disc image rotated by the given angle
+
+        :param deg: The angle in (integer) degrees {0,359}
+        :param resample: PIL resampling filter
+        """
+        if deg == 0:
+            return self.img_disc
+        width, height = self.img_disc.size
+        # a transpose keeps the image size for 180 degrees only,
+        # unless the image is square
+        if deg == 180 or (deg in self.transpose and width == height):
+            return self.img_disc.transpose(self.transpose[deg])
         # https://www.geeksforgeeks.org/how-to-rotate-an-image-using-python
-        img_rot = self.img_disc.rotate(degrees(angle))
-        disc = ImageTk.PhotoImage(img_rot)
-        self.canvas.create_image(self.center, image=disc)
-        self.disc = disc  # keep a reference
+        return self.img_disc.transform(self.img_disc.size, Image.AFFINE,
+                                       self._affine_mats[deg], resample)
+
+    def _bake_rotations(self):
+        """
+        Rotate the disc image for every degree, onto the sprite sheet
+        (worker thread)
+        """
+        width, height = self.img_disc.size
+        for deg in range(360):
+            x = (deg % self.sheet_columns) * width
+            y = (deg // self.sheet_columns) * height
+            self._sheet.paste(self.rotate_disc(deg), (x, y))
+            self._baked = deg + 1
@@ -27,16 +27,7 @@ class Gui:
         self.angle_step = 3
         self.speed = 10
 
-        # constants
-        self.k = tk.DoubleVar()  # spring constant
-        self.m = tk.DoubleVar()  # mass
-        self.k1_drag = tk.DoubleVar()  # drag
-        self.v0 = tk.DoubleVar()  # initial velocity
-        self.h0 = tk.DoubleVar()  # initial height
-        self.max_time = tk.DoubleVar()  # max animation time (s)
-
         self.animation_active = tk.BooleanVar()
-        self.animation_duration = tk.DoubleVar()
         self.cardinal_point = tk.StringVar()
         self.cardinal_point.set('N')  # default North
 
@@ -83,8 +74,7 @@ class Gui:
                       from_=10.0, to=500.0,
                       label='k',
                       showvalue=tk.TRUE, orient=tk.HORIZONTAL,
-                      command=self.spring_constants,
-                      variable=self.k)
+                      command=self.spring_constant('k'))
         s1.pack(fill=tk.NONE, side=tk.LEFT)
         s1.set(100)
 
@@ -92,8 +82,7 @@ class Gui:
                       from_=1.0, to=10.0, digits=4, resolution=0.0125,
                       label='mass (kg)',
                       showvalue=tk.TRUE, orient=tk.HORIZONTAL,
-                      command=self.spring_constants,
-                      variable=self.m)
+                      command=self.spring_constant('m'))
         s2.pack(fill=tk.NONE, side=tk.LEFT)
         s2.set(1.75)
 
@@ -101,8 +90,7 @@ class Gui:
                       from_=0.0, to=10.0, digits=4, resolution=0.0125,
                       label='t_max (s)',
                       showvalue=tk.TRUE, orient=tk.HORIZONTAL,
-                      command=self.spring_constants,
-                      variable=self.max_time)
+                      command=self.spring_constant('animation_max_time'))
         s3.pack(fill=tk.NONE, side=tk.LEFT)
         s3.set(1.75)
 
@@ -115,8 +103,7 @@ class Gui:
                       from_=0.0, to=10.0, digits=4, resolution=0.0125,
                       label='k1_drag',
                       showvalue=tk.TRUE, orient=tk.HORIZONTAL,
-                      command=self.spring_constants,
-                      variable=self.k1_drag)
+                      command=self.spring_constant('k1_drag'))
         s4.pack(fill=tk.NONE, side=tk.LEFT)
         s4.set(5.0)
 
@@ -124,8 +111,7 @@ class Gui:
                       from_=0.0, to=10.0, digits=4, resolution=0.0125,
                       label='v0',
                       showvalue=tk.TRUE, orient=tk.HORIZONTAL,
-                      command=self.spring_constants,
-                      variable=self.v0)
+                      command=self.spring_constant('v0'))
         s5.pack(fill=tk.NONE, side=tk.LEFT)
         s5.set(1.0)
 
@@ -133,8 +119,7 @@ class Gui:
                       from_=-10.0, to=10.0, digits=4, resolution=0.05,
                       label='h0 (cm)',
                       showvalue=tk.TRUE, orient=tk.HORIZONTAL,
-                      command=self.spring_constants,
-                      variable=self.h0)
+                      command=self.spring_constant('h0', 100))
         s6.pack(fill=tk.NONE, side=tk.LEFT)
         s6.set(0.0)
 
@@ -164,25 +149,24 @@ class Gui:
     def reposition_click(self, event=None):
         self.compass.cardinal_point(self.cardinal_point.get())
 
-    def spring_constants(self, event=None):
-        """ Set the compass' spring parameters """
-        self.compass.duration = self.animation_duration.get()
-        self.compass.k = self.k.get()
-        self.compass.m = self.m.get()
-        self.compass.k1_drag = self.k1_drag.get()
-        self.compass.h0 = self.h0.get() / 100
-        self.compass.v0 = self.v0.get()
-        self.compass.animation_max_time = self.max_time.get()
+    def spring_constant(self, name, divisor=1):
+        """
+        Return a Scale command, setting one of the compass' spring
+        parameters from the slider value (passed as a string)
+        """
+        def command(value):
+            setattr(self.compass, name, float(value) / divisor)
+        return command
 
     def rotate_left(self, event):
         self.angle += self.angle_step * self.speed * self.angle_resolution
-        logging.info("self.angle: {}".format(self.angle))
-        self.compass.angle = self.angle
+        logging.info("self.angle: %s", self.angle)
+        self.compass.set_angle_fast(self.angle)
 
     def rotate_right(self, event):
         self.angle -= self.angle_step * self.speed * self.angle_resolution
-        logging.info("self.angle: {}".format(self.angle))
-        self.compass.angle = self.angle
+        logging.info("self.angle: %s", self.angle)
+        self.compass.set_angle_fast(self.angle)
 
     def quit_click(self, event=None):
         if self.is_running:
@@ -1,5 +1,5 @@
 import logging
-import matplotlib.pyplot as plt
+import numpy as np
 
 
 class DampedSpring():
@@ -16,7 +16,12 @@ class DampedSpring():
     Source:
     https://micropore.wordpress.com/2011/03/02/python-1d-mass-and-spring-system-with-friction
     """
-    def __init__(self, dt=0.001, k=10, m=1, k1_drag=0.5, h0=0.5, v0=1.0):
+    __slots__ = ('dt', 'k', 'm', 'k1_drag',
+                 'h', 'v', 'a', 'K', 'V', 'E',
+                 'track_energy', '_km', '_dragm', '_propagator')
+
+    def __init__(self, dt=0.001, k=10, m=1, k1_drag=0.5, h0=0.5, v0=1.0,
+                 track_energy=False):
         h0 = h0  # initial deviation from equilibrium (m)
         v0 = v0  # initial speed (m/s)
         self.dt = dt  # time step (s)
@@ -30,15 +35,16 @@ class DampedSpring():
         self.v = v0  # velocity (m/s)
         self.a = 0  # acceleration (m/s^2)
 
-        logging.info("Spring constant (k): {} dt: {} m: {}".
-                     format(self.k, self.dt, self.m))
+        logging.info("Spring constant (k): %s dt: %s m: %s",
+                     self.k, self.dt, self.m)
 
         self.K = 0  # kinetic energy (J)
         self.V = 0  # potential energy (J)
         self.E = 0  # total energy (J)
+        self.track_energy = track_energy  # update K, V and E on bounce
+        self._recompute_coeffs()
         self.calc_energy()
         # self.Energy = self.E
-        self.calc_force()
 
     def calc_energy(self):
         """
@@ -46,8 +52,8 @@ class DampedSpring():
         E_kinetic = 1/2 mv^2
         E_potential = 1/2 kx^2
         """
-        self.K = self.m * pow(self.v, 2) / 2
-        self.V = self.k * pow(self.h, 2) / 2
+        self.K = self.m * self.v * self.v / 2
+        self.V = self.k * self.h * self.h / 2
         self.E = self.K + self.V
 
     def calc_force(self):
@@ -55,68 +61,143 @@ class DampedSpring():
         Equations:
         F = dp/dt = -kx
         p = mv
+
+        One (exact) time step, see _rebuild_propagator
         """
-        self.a = -(self.k / self.m) * self.h - (self.k1_drag / self.m) * self.v
-        self.v += self.a * self.dt
-        self.h += self.v * self.dt
+        (m00, m01), (m10, m11) = self._propagator
+        h = self.h
+        v = self.v
+        self.h = m00 * h + m01 * v
+        self.v = m10 * h + m11 * v
+        self.a = -self._km * self.h - self._dragm * self.v
         # self.dE = -self.k1_drag * pow(self.v, 2) * self.dt
         # self.Energy += self.dE
-        self.calc_energy()
-
-        logging.debug("E_k: {} E_p: {}".
-                      format(self.K, self.V))
 
     def bounce(self):
         """
-        Calculate (one integration step) and return height
+        Calculate (one time step) and return height
+
+        The energies are only updated with track_energy set, otherwise
+        use calc_energy() for those.
 
         :return: mass height
         """
         self.calc_force()
+        if self.track_energy:
+            self.calc_energy()
+            logging.debug("E_k: %s E_p: %s", self.K, self.V)
         return self.h
 
+    def _recompute_coeffs(self):
+        """
+        Precompute k/m, k1_drag/m and the propagator
+
+        To be called when k, m, k1_drag or dt change.
+        """
+        self._km = self.k / self.m
+        self._dragm = self.k1_drag / self.m
+        self._rebuild_propagator()
+
+    def _rebuild_propagator(self):
+        """
+        Precompute the exact time step, from the closed-form solution
+        (see states):
+        [h, v] <- exp(-y.dt) [[c + y.s, s], [-w0^2.s, c - y.s]] [h, v]
+        with c = cos wd.dt and s = sin(wd.dt)/wd
+        """
+        y = self._dragm / 2
+        decay, c, s = (float(x) for x in self._solution(self.dt))
+        self._propagator = ((decay * (c + y * s), decay * s),
+                            (-decay * self._km * s, decay * (c - y * s)))
+
+    def _solution(self, t):
+        """
+        Terms of the closed-form solution at time(s) t
+
+        :return: exp(-yt), cos wd.t and sin(wd.t)/wd
+        """
+        y = self._dragm / 2
+        wd_2 = self._km - y * y
+        if wd_2 > 0:
+            wd = np.sqrt(wd_2)
+            c = np.cos(wd * t)
+            s = np.sin(wd * t) / wd
+        elif wd_2 < 0:
+            wd = np.sqrt(-wd_2)
+            c = np.cosh(wd * t)
+            s = np.sinh(wd * t) / wd
+        else:
+            c = np.ones_like(t)
+            s = t
+        return np.exp(-y * t), c, s
+
+    def trajectory(self, steps):
+        """
+        Calculate the next steps at once, see states()
+
+        :param steps: number of time steps
+        :return: mass height for each step (numpy array)
+        """
+        return self.states(steps)[0]
+
+    def states(self, steps):
+        """
+        Calculate the next steps at once, using the closed-form solution
+        instead of integrating step by step.
+
+        Equations (y = k1_drag/2m, w0^2 = k/m, wd^2 = w0^2 - y^2):
+        h(t) = exp(-yt) (h0 cos wd.t + (v0 + y.h0)/wd sin wd.t)
+        v(t) = exp(-yt) (v0 cos wd.t - (w0^2.h0 + y.v0)/wd sin wd.t)
+        For an overdamped spring (wd^2 < 0) cos/sin become cosh/sinh,
+        for a critically damped spring sin(wd.t)/wd becomes t.
+
+        :param steps: number of time steps
+        :return: mass height and velocity for each step (numpy arrays)
+        """
+        t = np.arange(1, steps + 1) * self.dt
+        w0_2 = self._km
+        y = self._dragm / 2
+        decay, c, s = self._solution(t)
+        h = decay * (self.h * c + (self.v + y * self.h) * s)
+        v = decay * (self.v * c - (w0_2 * self.h + y * self.v) * s)
+        if steps > 0:
+            self.h = h[-1]
+            self.v = v[-1]
+            self.a = -self._km * self.h - self._dragm * self.v
+            if self.track_energy:
+                self.calc_energy()
+        return h, v
+
 
 def main():
     """ Plot amplitude and energy (potential and kinetic) """
-    t = 0
+    # only needed for the plots, not when used by the compass widget
+    import matplotlib.pyplot as plt
+
     dt = 0.01
-    T = [0.]
-    X = [0.]
-    K = [0.]
-    V = [0.]
-    E = [0.]
+    steps = int(10/dt)
     spring = DampedSpring(dt=dt)
-    for i in range(int(10/dt)):
-        T.append(t * dt)
-        X.append(spring.bounce())
-        K.append(spring.K)
-        V.append(spring.V)
-        E.append(spring.E)
-        t += 1
-
-    # remove t0 values
-    T.pop(0)
-    X.pop(0)
-    K.pop(0)
-    V.pop(0)
-    E.pop(0)
-
-    plt.figure()
-    plt.axhline(0, color='black')
-    plt.plot(T, X)
-    plt.title("Damped spring")
-    plt.legend(("Displacement",))
-    plt.xlabel("Time (s)")
-    plt.ylabel("Displacement (m)")
-
-    plt.figure()
-    plt.plot(T, K)
-    plt.plot(T, V)
-    plt.plot(T, E)
-    plt.title("Damped spring")
-    plt.legend(("Kinetic", "Potential", "Total",))
-    plt.xlabel("Time (s)")
-    plt.ylabel("Energy (J)")
+    T = np.arange(1, steps + 1) * dt
+    X, vel = spring.states(steps)
+    K = spring.m * vel * vel / 2
+    V = spring.k * X * X / 2
+    E = K + V
+
+    plt.style.use('fast')
+    fig, (ax1, ax2) = plt.subplots(2, 1, sharex=True)
+    fig.suptitle("Damped spring")
+
+    ax1.axhline(0, color='black')
+    ax1.plot(T, X)
+    ax1.legend(("Displacement",))
+    ax1.set_ylabel("Displacement (m)")
+
+    ax2.plot(T, K)
+    ax2.plot(T, V)
+    ax2.plot(T, E)
+    ax2.legend(("Kinetic", "Potential", "Total",))
+    ax2.set_xlabel("Time (s)")
+    ax2.set_ylabel("Energy (J)")
     plt.show()
 
 